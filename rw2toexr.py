@@ -1,33 +1,222 @@
 import sys, os
+import time
+import queue
+import threading
+import multiprocessing
+import concurrent.futures
 import rawpy
 from pathlib import Path
-import pyexr
+import OpenEXR
 import numpy as np
 
+try:
+    import numba
+except ImportError:  # optional accelerator; NumPy fallback below
+    numba = None
+
 from PySide6.QtWidgets import (QApplication, QLabel, QPushButton,
-                               QVBoxLayout, QMainWindow, QProgressBar, QLineEdit, QRadioButton, QGroupBox, QWidget, QHBoxLayout, QMessageBox, QFileDialog)
-from PySide6.QtCore import Slot, Qt, Signal, QThread
+                               QVBoxLayout, QMainWindow, QProgressBar, QLineEdit, QRadioButton, QGroupBox, QWidget, QHBoxLayout, QMessageBox, QFileDialog, QCheckBox)
+from PySide6.QtCore import (Slot, Qt, Signal, QObject, QRunnable,
+                            QThreadPool)
+
+
+# With the 3.x File API the data window comes from the channel array, so
+# the header no longer depends on frame dimensions and can be built once
+# instead of per file.
+_EXR_HEADER = {
+    "compression": OpenEXR.ZIP_COMPRESSION,
+    "type": OpenEXR.scanlineimage,
+}
+
+# Forward-compatible only: no published PyPI OpenEXR binding (checked
+# through 3.4.x) exports setGlobalThreadCount, so this is currently a
+# no-op on every supported install and compression runs single-threaded
+# inside each writer. Kept so thread control kicks in if the bindings
+# ever expose the IlmThread pool.
+if hasattr(OpenEXR, "setGlobalThreadCount"):
+    OpenEXR.setGlobalThreadCount(os.cpu_count() or 1)
+
+
+# Normalization scale as a float32 scalar: a plain Python float would
+# promote the ufunc to a float64 loop, halving SIMD lane throughput.
+_U16_TO_UNIT = np.float32(1.0 / 65535.0)
+
+
+# Conversion scratch buffers, keyed by (shape, dtype) and reused across
+# frames of the same resolution. Recycled pages skip the first-touch
+# fault cost of a fresh ~100 MB allocation per file; each process-pool
+# worker holds its own copy of this module state, so there is no sharing.
+_scratch = {}
+
+
+def _scratch_buffer(shape, dtype):
+    key = (shape, np.dtype(dtype))
+    buf = _scratch.get(key)
+    if buf is None:
+        buf = _scratch[key] = np.empty(shape, dtype)
+    return buf
+
+
+if numba is not None:
+    @numba.njit(parallel=True, nogil=True, cache=True)
+    def _normalize_f32(rgb, out):
+        # uint16 HxWx3 -> normalized float32 in one parallel pass with
+        # the GIL released, so it overlaps other Python-side work.
+        inv = np.float32(1.0 / 65535.0)
+        for y in numba.prange(rgb.shape[0]):
+            for x in range(rgb.shape[1]):
+                for c in range(3):
+                    out[y, x, c] = rgb[y, x, c] * inv
+else:
+    _normalize_f32 = None
+
+
+def _batch_worker_init():
+    # LibRaw parallelizes its demosaic internally with OpenMP (when built
+    # with LIBRAW_USE_OPENMP). The single-file path benefits from that,
+    # but batch mode already runs one conversion per core, so keep each
+    # worker process single-threaded to avoid oversubscription.
+    os.environ["OMP_NUM_THREADS"] = "1"
+    # numba reads NUMBA_NUM_THREADS at import, which unpickling this
+    # initializer has already triggered, so pin via the runtime API.
+    if numba is not None:
+        numba.set_num_threads(1)
+    # Same forward-compatible no-op as the import-time block above.
+    if hasattr(OpenEXR, "setGlobalThreadCount"):
+        OpenEXR.setGlobalThreadCount(1)
+
+
+def _decode(input_path, raw_counts=False, fast=False, reuse=True):
+    # Decode one RW2 into the array handed to OpenEXR. reuse=False
+    # returns a private buffer instead of the per-process scratch cache,
+    # for callers that keep frames alive past the next decode.
+    postprocess_params = dict(
+            gamma=(1, 1),
+            no_auto_bright=True,
+            output_bps=16,
+            output_color=rawpy.ColorSpace.raw,
+        )
+    if fast:
+        # Bilinear demosaic runs 3-5x faster than LibRaw's AHD
+        # default; also skip FBDD noise reduction, highlight
+        # reconstruction, auto white balance and rotation - work a
+        # color-science-agnostic linear archive redoes downstream
+        # anyway.
+        postprocess_params.update(
+            demosaic_algorithm=rawpy.DemosaicAlgorithm.LINEAR,
+            fbdd_noise_reduction=rawpy.FBDDNoiseReductionMode.Off,
+            highlight_mode=rawpy.HighlightMode.Clip,
+            use_camera_wb=False,
+            use_auto_wb=False,
+            user_flip=0,
+        )
+    with rawpy.imread(input_path) as raw:
+        rgb = raw.postprocess(**postprocess_params)
+
+    # rawpy returns a C-contiguous frame; the guard is free in that
+    # case and keeps the ufuncs on their fast contiguous loops
+    # otherwise.
+    rgb = np.ascontiguousarray(rgb)
+
+    def out_buffer(dtype):
+        if reuse:
+            return _scratch_buffer(rgb.shape, dtype)
+        return np.empty(rgb.shape, dtype)
+
+    if raw_counts:
+        # EXR has no 16-bit integer type; widening to uint32 keeps the
+        # sensor values bit-exact and skips the float conversion
+        # entirely. Consumers divide by 65535 themselves.
+        pixels = out_buffer(np.uint32)
+        np.copyto(pixels, rgb, casting='same_kind')
+    else:
+        # float16 arrays map to HALF channels, halving the bytes
+        # pushed through the compressor and onto disk. Multiplying
+        # straight into the preallocated output fuses the cast and
+        # the scale into one ufunc pass with no full-frame
+        # temporaries.
+        pixels = out_buffer(np.float16)
+        if _normalize_f32 is not None and numba.get_num_threads() > 1:
+            # Parallel nogil normalize into a float32 plane, then one
+            # memory-bound cast to half (Numba has no CPU float16
+            # stores, so that last step stays in NumPy). Only worth it
+            # when the kernel actually fans out: batch workers pin numba
+            # to one thread, and a serial two-pass kernel plus an extra
+            # float32 frame loses to the fused single-pass multiply
+            # below.
+            f32 = _scratch_buffer(rgb.shape, np.float32)
+            _normalize_f32(rgb, f32)
+            np.copyto(pixels, f32, casting='unsafe')
+        else:
+            np.multiply(rgb, _U16_TO_UNIT, out=pixels, casting='unsafe')
+    # The decoded uint16 frame dies here, so peak memory during
+    # compression is one output frame, not both.
+    return pixels
+
+
+def _encode(pixels, output_path):
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    # The OpenEXR 3.x File API takes the interleaved HxWx3 buffer
+    # directly and deinterleaves it in C++ in one pass; the scratch
+    # buffers come from np.empty and are always C-contiguous, so no
+    # per-channel split or strided copy ever happens on the Python
+    # side. A shallow copy of the header keeps attributes File writes
+    # back from leaking between frames.
+    #
+    # Stage to a sibling temp file and rename into place: the writer
+    # gets one sequential stream (kind to network filesystems) and a
+    # crash or cancel never leaves a half-written .exr behind.
+    tmp_path = output_path + '.tmp'
+    try:
+        with OpenEXR.File(dict(_EXR_HEADER), {"RGB": pixels}) as exr:
+            exr.write(tmp_path)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _convert_one(input_path, output_path, raw_counts=False, fast=False):
+    # Module-level so it can be pickled into process-pool workers.
+    try:
+        _encode(_decode(input_path, raw_counts, fast), output_path)
+    except Exception as e:
+        raise Exception(f"Failed to convert {Path(input_path).name}: {str(e)}")
 
-class ConversionThread(QThread):
+
+class WorkerSignals(QObject):
+    # QRunnable is not a QObject, so the worker's signals live on a
+    # small companion object.
     progress_updated = Signal(int, str)
     conversion_finished = Signal(bool, str)
-    
-    def __init__(self, input_path, output_path, is_batch=False):
+
+
+class ConversionWorker(QRunnable):
+    def __init__(self, input_path, output_path, is_batch=False,
+                 raw_counts=False, fast=False):
         super().__init__()
+        self.signals = WorkerSignals()
         self.input_path = input_path
         self.output_path = output_path
         self.is_batch = is_batch
+        self.raw_counts = raw_counts
+        self.fast = fast
         self.cancel_requested = False
-        
+        # The app keeps a reference for cancellation, so Qt must not
+        # delete the runnable when run() returns.
+        self.setAutoDelete(False)
+
     def run(self):
         try:
             if self.is_batch:
                 self.batch_convert()
             else:
                 self.convert_single()
-            self.conversion_finished.emit(True, "Conversion completed successfully!")
+            self.signals.conversion_finished.emit(True, "Conversion completed successfully!")
         except Exception as e:
-            self.conversion_finished.emit(False, f"Error: {str(e)}")
+            self.signals.conversion_finished.emit(False, f"Error: {str(e)}")
             
     def convert_single(self):
         input_file = Path(self.input_path)
@@ -42,55 +231,154 @@ class ConversionThread(QThread):
             else:  # Output is a specific file path
                 output_file = output_path
         
-        self.progress_updated.emit(0, f"Converting {input_file.name}...")
+        self.signals.progress_updated.emit(0, f"Converting {input_file.name}...")
         try:
-            self.rw2_to_exr(str(input_file), str(output_file))
-            self.progress_updated.emit(100, f"Successfully converted to {output_file}")
+            _convert_one(str(input_file), str(output_file),
+                         self.raw_counts, self.fast)
+            self.signals.progress_updated.emit(100, f"Successfully converted to {output_file}")
         except Exception as e:
-            self.progress_updated.emit(0, f"Error: {str(e)}")
+            self.signals.progress_updated.emit(0, f"Error: {str(e)}")
             raise
         
     def batch_convert(self):
         input_dir = Path(self.input_path)
         output_dir = Path(self.output_path) if self.output_path else input_dir
         
+        if not input_dir.is_dir():
+            raise ValueError(f"No RW2 files found in {input_dir}")
+
         output_dir.mkdir(parents=True, exist_ok=True)
-        rw2_files = list(input_dir.glob('*.RW2')) + list(input_dir.glob('*.rw2'))
+        # One scandir pass with a case-insensitive suffix check instead of
+        # two glob walks over the same directory.
+        rw2_files = sorted(
+            Path(entry.path) for entry in os.scandir(input_dir)
+            if entry.is_file() and entry.name.lower().endswith('.rw2')
+        )
         
         if not rw2_files:
             raise ValueError(f"No RW2 files found in {input_dir}")
         
         total_files = len(rw2_files)
-        for i, input_file in enumerate(rw2_files):
-            if self.cancel_requested:
-                break
-                
-            output_file = output_dir / (input_file.stem + '.exr')
-            self.progress_updated.emit(
-                int((i+1)/total_files*100),
-                f"Converting {i+1}/{total_files}: {input_file.name}"
-            )
-            self.rw2_to_exr(str(input_file), str(output_file))
-            
-    def rw2_to_exr(self, input_path, output_path):
+        if getattr(sys, "frozen", False):
+            # multiprocessing inside a PyInstaller bundle re-launches the
+            # executable per worker, which without freeze_support means
+            # spawning new GUI windows instead of workers. Use the
+            # two-stage thread pipeline there instead.
+            self.pipelined_convert(rw2_files, output_dir)
+            return
+
+        # One worker process per core: file-level conversions share no
+        # state, and separate processes sidestep any GIL held inside
+        # rawpy/OpenEXR while also isolating per-file LibRaw crashes.
+        max_workers = min(total_files, os.cpu_count() or 1)
+        # Spawn rather than fork: by now the GUI process is multi-threaded
+        # (Qt pool, IlmThread workers, possibly OpenMP from an earlier
+        # conversion), and forked children would inherit thread-pool state
+        # whose threads don't exist. Spawned workers import the module
+        # fresh, so the initializer's pins land before any parallel region
+        # starts.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_batch_worker_init) as pool:
+            futures = {
+                pool.submit(_convert_one, str(f),
+                            str(output_dir / (f.stem + '.exr')),
+                            self.raw_counts, self.fast): f
+                for f in rw2_files
+            }
+            done = 0
+            last_emit = 0.0
+            for future in concurrent.futures.as_completed(futures):
+                if self.cancel_requested:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    break
+                try:
+                    future.result()
+                except Exception:
+                    # Abort on the first failure like the sequential code
+                    # did; without the explicit cancel, the executor's
+                    # __exit__ would drain every pending file before the
+                    # error dialog appeared.
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+                done += 1
+                # Completions arrive in bursts from the pool; cap the
+                # queued cross-thread signals at ~5/s so the UI thread
+                # isn't flooded. The final file always reports.
+                now = time.monotonic()
+                if done == total_files or now - last_emit > 0.2:
+                    last_emit = now
+                    self.signals.progress_updated.emit(
+                        int(done/total_files*100),
+                        f"Converted {done}/{total_files}: {futures[future].name}"
+                    )
+
+    def pipelined_convert(self, rw2_files, output_dir):
+        # Two-stage producer/consumer pipeline: a decode thread feeds a
+        # 2-slot queue while this thread encodes, so the demosaic of file
+        # N+1 overlaps the compression and write of file N. Both heavy
+        # stages run in C with the GIL released, so the two threads
+        # genuinely run in parallel. Frames in flight use private buffers
+        # (reuse=False) since the scratch cache would be overwritten while
+        # the encoder still reads it.
+        total_files = len(rw2_files)
+        frames = queue.Queue(maxsize=2)
+        decode_error = []
+
+        def decode_files():
+            try:
+                for f in rw2_files:
+                    if self.cancel_requested:
+                        break
+                    pixels = _decode(str(f), self.raw_counts, self.fast,
+                                     reuse=False)
+                    frames.put((pixels, f))
+            except Exception as e:
+                decode_error.append(
+                    Exception(f"Failed to convert {f.name}: {str(e)}"))
+            finally:
+                frames.put(None)
+
+        decoder = threading.Thread(target=decode_files, daemon=True)
+        decoder.start()
+
+        done = 0
+        last_emit = 0.0
+        drained = False
         try:
-            with rawpy.imread(input_path) as raw:
-                rgb = raw.postprocess(
-                    gamma=(1,1),
-                    no_auto_bright=True,
-                    output_bps=16,
-                    output_color=rawpy.ColorSpace.raw
-                )
-            
-            rgb_float = rgb.astype(np.float32) / 65535.0
-            if rgb_float.dtype != np.float32:
-                rgb_float = rgb_float.astype(np.float32)
-            
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            pyexr.write(str(output_path), rgb_float)
-            
-        except Exception as e:
-            raise Exception(f"Failed to convert {Path(input_path).name}: {str(e)}")
+            while True:
+                item = frames.get()
+                if item is None:
+                    drained = True
+                    break
+                pixels, f = item
+                if self.cancel_requested:
+                    continue
+                try:
+                    _encode(pixels, str(output_dir / (f.stem + '.exr')))
+                except Exception as e:
+                    raise Exception(
+                        f"Failed to convert {f.name}: {str(e)}")
+                done += 1
+                now = time.monotonic()
+                if done == total_files or now - last_emit > 0.2:
+                    last_emit = now
+                    self.signals.progress_updated.emit(
+                        int(done/total_files*100),
+                        f"Converted {done}/{total_files}: {f.name}"
+                    )
+        finally:
+            if not drained:
+                # Unblock the decoder if it is waiting on a full queue,
+                # then eat everything up to its sentinel.
+                self.cancel_requested = True
+                while frames.get() is not None:
+                    pass
+            decoder.join()
+
+        if decode_error:
+            raise decode_error[0]
 
 
 class RW2ToEXRApp(QMainWindow):
@@ -99,7 +387,7 @@ class RW2ToEXRApp(QMainWindow):
         self.setWindowTitle("RW2 to EXR Converter")
         self.setMinimumSize(300, 500)
 
-        self.conversion_thread = None
+        self.conversion_worker = None
 
         main_widget = QWidget()
         layout = QVBoxLayout()
@@ -113,7 +401,29 @@ class RW2ToEXRApp(QMainWindow):
         mode_layout.addWidget(self.single_radio)
         mode_layout.addWidget(self.batch_radio)
         self.mode_group.setLayout(mode_layout)
-        
+
+        # Output options
+        self.options_group = QGroupBox("Output Options")
+        options_layout = QVBoxLayout()
+        quality_layout = QHBoxLayout()
+        self.hq_radio = QRadioButton("High Quality")
+        self.fast_radio = QRadioButton("Fast")
+        self.hq_radio.setChecked(True)
+        self.fast_radio.setToolTip(
+            "Bilinear demosaic, no noise reduction or highlight recovery "
+            "- much faster, fine for proxies"
+        )
+        quality_layout.addWidget(self.hq_radio)
+        quality_layout.addWidget(self.fast_radio)
+        options_layout.addLayout(quality_layout)
+        self.raw_counts_check = QCheckBox("Store raw sensor values (32-bit integer)")
+        self.raw_counts_check.setToolTip(
+            "Write bit-exact sensor values as UINT channels instead of "
+            "0-1 normalized half floats"
+        )
+        options_layout.addWidget(self.raw_counts_check)
+        self.options_group.setLayout(options_layout)
+
         # Input selection
         self.input_label = QLabel("Input File/Directory:")
         self.input_path = QLineEdit()
@@ -143,6 +453,7 @@ class RW2ToEXRApp(QMainWindow):
         
         # Layout
         layout.addWidget(self.mode_group)
+        layout.addWidget(self.options_group)
         layout.addWidget(self.input_label)
         layout.addWidget(self.input_path)
         layout.addWidget(self.browse_input)
@@ -200,21 +511,24 @@ class RW2ToEXRApp(QMainWindow):
         self.progress.setValue(0)
         
         is_batch = self.batch_radio.isChecked()
-        self.conversion_thread = ConversionThread(
+        self.conversion_worker = ConversionWorker(
             self.input_path.text(),
             self.output_path.text(),
-            is_batch
+            is_batch,
+            self.raw_counts_check.isChecked(),
+            self.fast_radio.isChecked()
         )
         
-        self.conversion_thread.progress_updated.connect(self.update_progress)
-        self.conversion_thread.conversion_finished.connect(self.conversion_done)
-        self.conversion_thread.start()
+        self.conversion_worker.signals.progress_updated.connect(self.update_progress)
+        self.conversion_worker.signals.conversion_finished.connect(self.conversion_done)
+        QThreadPool.globalInstance().start(self.conversion_worker)
 
     def update_progress(self, value, message):
         self.progress.setValue(value)
         self.status_label.setText(message)
         
     def conversion_done(self, success, message):
+        self.conversion_worker = None
         self.convert_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
         
@@ -225,8 +539,8 @@ class RW2ToEXRApp(QMainWindow):
 
     @Slot()
     def cancel_conversion(self):
-        if self.conversion_thread and self.conversion_thread.isRunning():
-            self.conversion_thread.cancel_requested = True
+        if self.conversion_worker is not None:
+            self.conversion_worker.cancel_requested = True
             self.status_label.setText("Cancelling...")
             self.cancel_btn.setEnabled(False)
 